@@ -1,10 +1,19 @@
 import time
+import array
 import math
-from collections import Counter, deque
+import atexit
+import threading
+from collections import Counter, OrderedDict, deque
 import os
 import csv
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 import psutil
-import pandas as pd
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -17,30 +26,109 @@ CONFIG = {
     "total_ops_threshold": 50,
     "summary_interval": 10,          # Terminal summary every 10 seconds
     "csv_interval": 60,              # CSV write every 60 seconds (less storage)
+    "active_high_entropy_cap": 10_000,  # Oldest active high-entropy paths dropped beyond this
+    "entropy_workers": 4,            # Threads reading files for entropy off the watchdog thread
+    "max_pending_entropy": 512,      # Handlers block once this many entropy jobs are queued
+    "csv_batch_rows": 256,           # Rows buffered in memory before a forced CSV flush
+    "modify_settle": 0.25,           # Seconds a file must stay quiet before modify entropy runs
     "csv_file": 'ransomware_events.csv'
 }
 
-def calculate_entropy(file_path, max_bytes=4096):
+def _entropy_numpy(buf):
+    counts = np.bincount(buf, minlength=256)
+    p = counts[counts != 0] / len(buf)
+    return float(-(p * np.log2(p)).sum())
+
+
+def _entropy_loop(buf):
+    # Numba kernel: histogram and log2 sum in one pass, no temporaries
+    counts = np.zeros(256, dtype=np.int64)
+    for b in buf:
+        counts[b] += 1
+    n = len(buf)
+    s = 0.0
+    for i in range(256):
+        if counts[i]:
+            p = counts[i] / n
+            s -= p * math.log2(p)
+    return s
+
+
+_entropy_kernel = njit(cache=True, fastmath=True)(_entropy_loop) if njit else _entropy_numpy
+
+
+@lru_cache(maxsize=4096)
+def _entropy_cached(key, max_bytes):
+    # key is (path, st_mtime_ns, st_size) so any rewrite of the file misses the cache
+    file_path, _, size = key
+    if size == 0:
+        return 0.0
+    # Unbuffered: one read() syscall, no BufferedReader for a one-shot sample
+    with open(file_path, 'rb', buffering=0) as f:
+        data = f.read(max_bytes)
+    if not data:
+        return 0.0
+    entropy = float(_entropy_kernel(np.frombuffer(data, dtype=np.uint8)))
+    return max(0.0, round(entropy, 2))
+
+
+def _safe_stat(path):
+    # One stat per event: existence, size and the entropy cache key all come from it
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def calculate_entropy(file_path, max_bytes=4096, st=None):
     try:
-        size = os.path.getsize(file_path)
-        if size == 0:
-            return 0.0
-        with open(file_path, 'rb') as f:
-            data = f.read(min(max_bytes, size))
-        if not data:
-            return 0.0
-        counter = Counter(data)
-        length = len(data)
-        entropy = -sum((count / length) * math.log2(count / length) for count in counter.values() if count > 0)
-        return max(0.0, round(entropy, 2))
+        if st is None:
+            st = os.stat(file_path)
+        return _entropy_cached((file_path, st.st_mtime_ns, st.st_size), max_bytes)
     except Exception:
         return 0.0
 
 
+def _file_ext(path, default=''):
+    # Same result as os.path.splitext(path)[1].lower(), using only C-level str methods
+    name = path[path.rfind(os.sep) + 1:].lstrip('.')
+    i = name.rfind('.')
+    return name[i:].lower() if i > 0 else default
+
+
+def _csv_quote(value):
+    value = str(value)
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+_open_files_lock = threading.Lock()  # concurrent misses wait for one scan instead of each running their own
+
+
+@lru_cache(maxsize=1)
+def _open_files_index(second):
+    # One process scan per second, shared by every event in that second
+    index = {}
+    for p in psutil.process_iter(['pid', 'name', 'open_files']):
+        for f in p.info['open_files'] or ():
+            index.setdefault(f.path, (p.info['name'], p.info['pid']))
+    return index
+
+
 class RansomwareFileHandler(FileSystemEventHandler):
 
     IGNORED_PREFIXES = ('.', '#', '__')
     IGNORED_SUFFIXES = ('.swp', '.swx', '~', '.save', '.lock', '.tmp', '.bak')
+    SUSPICIOUS_EXTS = (
+        '.locked', '.crypt', '.encrypted', '.pay', '.bitcoin', '.ransom',
+        '.wncry', '.ryuk', '.conti', '.locky', '.svchost', '.random'
+    )
+    # Compressed formats read as "encrypted" by construction; handlers record the event but never read them
+    HIGH_ENTROPY_BY_DESIGN = frozenset({
+        '.zip', '.gz', '.xz', '.bz2', '.7z', '.jpg', '.jpeg', '.png', '.mp4', '.mp3',
+        '.pdf', '.mkv', '.webp', '.docx', '.xlsx', '.pptx'
+    })
 
     def __init__(self):
         self.created_events = deque(maxlen=1000)
@@ -48,172 +136,311 @@ class RansomwareFileHandler(FileSystemEventHandler):
         self.deleted_events = deque(maxlen=1000)
         self.renamed_events = deque(maxlen=1000)
         self.high_entropy_count = 0
-        self.active_high_entropy_files = set()
+        self.active_high_entropy_files = OrderedDict()  # path -> None, oldest first
         self.extensions_last_10s = deque(maxlen=1000)
-        self.feature_vectors = []  # For ML engine integration
-
-        # CSV setup (headers only once)
-        if not os.path.exists(CONFIG['csv_file']):
-            with open(CONFIG['csv_file'], 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'type', 'created_10s', 'modified_10s', 'deleted_10s', 'renamed_10s',
-                                 'unique_exts_10s', 'high_entropy_total', 'active_high_entropy', 'details'])
+        self._ext_counts = Counter()  # ext -> occurrences in extensions_last_10s
+        # Feature columns for ML engine integration; fields an event doesn't have are nan/-1/''
+        self._fv_event_type = []
+        self._fv_entropy = array.array('f')
+        self._fv_size = array.array('q')
+        self._fv_ext = []
+        self._fv_process = []
+        self._fv_old_ext = []
+        self._fv_new_ext = []
+
+        # Entropy runs on a worker pool; the lock guards all window/CSV/feature state
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=CONFIG['entropy_workers'])
+        self._pending = threading.Semaphore(CONFIG['max_pending_entropy'])
+
+        # Modify bursts for one path collapse into a single entropy job once the file settles
+        self._settling = OrderedDict()  # path -> (due, ext, now) for the latest modify, ordered by due
+        self._in_flight = Counter()  # path -> entropy jobs submitted but not finished
+        self._stop = threading.Event()
+        self._background_thread = threading.Thread(target=self._background_loop, daemon=True)
+        self._background_thread.start()
+
+        # CSV setup (headers only once); one buffered handle for the whole session
+        new_file = not os.path.exists(CONFIG['csv_file'])
+        self._csv_fh = open(CONFIG['csv_file'], 'a', newline='', buffering=1 << 16)
+        self._csv_batch = []  # formatted rows waiting for _flush_csv
+        self._csv_write_lock = threading.Lock()  # serialises file writes so batches land in order
+        atexit.register(self.close)
+        if new_file:
+            writer = csv.writer(self._csv_fh)
+            writer.writerow(['timestamp', 'type', 'created_10s', 'modified_10s', 'deleted_10s', 'renamed_10s',
+                             'unique_exts_10s', 'high_entropy_total', 'active_high_entropy', 'details'])
 
     def should_ignore(self, path_str):
         filename = os.path.basename(path_str)
         if filename.startswith(self.IGNORED_PREFIXES): return True
-        if any(filename.endswith(s) for s in self.IGNORED_SUFFIXES): return True
+        if filename.endswith(self.IGNORED_SUFFIXES): return True
         return False
 
-    def _record_event(self, queue):
-        queue.append(time.time())
-
-    def _count_last_10s(self, queue):
-        now = time.time()
-        return sum(1 for t in queue if now - t <= 10)
-
-    def _get_unique_extensions_last_10s(self):
-        now = time.time()
-        recent_exts = set()
-        for t, ext in self.extensions_last_10s:
-            if now - t <= 10:
-                recent_exts.add(ext)
-        return len(recent_exts)
-
-    def _log_to_csv(self, event_type, details=''):
+    def _trim(self, queue, now):
+        # Entries are appended in time order, so expired ones are always on the left
+        cutoff = now - 10
+        while queue and queue[0] < cutoff:
+            queue.popleft()
+
+    def _trim_and_append(self, queue, now):
+        with self._lock:
+            self._trim(queue, now)
+            queue.append(now)
+
+    def _count_last_10s(self, queue, now=None):
+        with self._lock:
+            self._trim(queue, time.monotonic() if now is None else now)
+            return len(queue)
+
+    def _pop_ext(self):
+        _, ext = self.extensions_last_10s.popleft()
+        self._ext_counts[ext] -= 1
+        if not self._ext_counts[ext]:
+            del self._ext_counts[ext]
+
+    def _trim_exts(self, now):
+        cutoff = now - 10
+        queue = self.extensions_last_10s
+        while queue and queue[0][0] < cutoff:
+            self._pop_ext()
+
+    def _push_ext(self, now, ext):
+        with self._lock:
+            self._trim_exts(now)
+            if len(self.extensions_last_10s) == self.extensions_last_10s.maxlen:
+                self._pop_ext()
+            self.extensions_last_10s.append((now, ext))
+            self._ext_counts[ext] += 1
+
+    def _get_unique_extensions_last_10s(self, now=None):
+        with self._lock:
+            self._trim_exts(time.monotonic() if now is None else now)
+            return len(self._ext_counts)
+
+    def _log_to_csv(self, event_type, details='', now=None):
+        # Windows run on the monotonic clock; only the timestamp column uses wall time
+        if now is None:
+            now = time.monotonic()
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        row = [
-            timestamp,
-            event_type,
-            self._count_last_10s(self.created_events),
-            self._count_last_10s(self.modified_events),
-            self._count_last_10s(self.deleted_events),
-            self._count_last_10s(self.renamed_events),
-            self._get_unique_extensions_last_10s(),
-            self.high_entropy_count,
-            len(self.active_high_entropy_files),
-            details
-        ]
-        with open(CONFIG['csv_file'], 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(row)
-
-    def _get_process_info(self, event):
+        # Fixed schema of numbers + one free-text column, so only details needs quoting
+        with self._lock:
+            self._csv_batch.append(
+                f"{timestamp},{event_type},"
+                f"{self._count_last_10s(self.created_events, now)},"
+                f"{self._count_last_10s(self.modified_events, now)},"
+                f"{self._count_last_10s(self.deleted_events, now)},"
+                f"{self._count_last_10s(self.renamed_events, now)},"
+                f"{self._get_unique_extensions_last_10s(now)},"
+                f"{self.high_entropy_count},{len(self.active_high_entropy_files)},"
+                f"{_csv_quote(details)}\r\n"
+            )
+
+    def _flush_csv(self):
+        # Only the main loop and the background thread call this; handlers never touch disk.
+        # The batch is swapped out under _lock and written outside it
+        with self._csv_write_lock:
+            with self._lock:
+                batch, self._csv_batch = self._csv_batch, []
+            if self._csv_fh.closed:
+                return
+            self._csv_fh.writelines(batch)
+            self._csv_fh.flush()
+
+    def _settle(self, path, ext, now):
+        # Caller holds _lock. Re-inserting at the end keeps _settling ordered by due time
+        self._settling.pop(path, None)
+        self._settling[path] = (now + CONFIG['modify_settle'], ext, now)
+
+    def _pop_settled(self, cutoff):
+        due = []
+        with self._lock:
+            while self._settling:
+                path = next(iter(self._settling))
+                t, ext, now = self._settling[path]
+                if t > cutoff:
+                    break
+                del self._settling[path]
+                due.append((path, ext, now))
+        return due
+
+    def _background_loop(self):
+        while not self._stop.wait(CONFIG['modify_settle'] / 5):
+            for path, ext, now in self._pop_settled(time.monotonic()):
+                self._submit_entropy('modify', path, ext, now)
+            if len(self._csv_batch) >= CONFIG['csv_batch_rows']:
+                self._flush_csv()
+
+    def close(self):
+        self._stop.set()
+        self._background_thread.join()
+        for path, ext, now in self._pop_settled(math.inf):
+            self._submit_entropy('modify', path, ext, now)
+        self._pool.shutdown(wait=True)
+        self._flush_csv()
+        with self._csv_write_lock:
+            self._csv_fh.close()
+
+    def _mark_high_entropy(self, path):
+        active = self.active_high_entropy_files
+        active.pop(path, None)
+        active[path] = None
+        if len(active) > CONFIG['active_high_entropy_cap']:
+            active.popitem(last=False)
+
+    def _append_features(self, event_type, entropy=math.nan, size=-1, ext='', process=None,
+                         old_ext='', new_ext=''):
+        with self._lock:
+            self._fv_event_type.append(event_type)
+            self._fv_entropy.append(entropy)
+            self._fv_size.append(size)
+            self._fv_ext.append(ext)
+            self._fv_process.append(process or '')
+            self._fv_old_ext.append(old_ext)
+            self._fv_new_ext.append(new_ext)
+
+    def _get_process_info(self, path):
+        # Keyed on lookup time, not event time: delayed jobs must share the live second's scan
+        with _open_files_lock:
+            index = _open_files_index(int(time.monotonic()))
+        return index.get(path, (None, None))
+
+    def _submit(self, fn, *args):
+        # Back-pressure: a flood blocks the observer here instead of growing the queue unbounded
+        self._pending.acquire()
         try:
-            pids = psutil.pids()
-            for pid in pids:
-                p = psutil.Process(pid)
-                if event.src_path in [f.path for f in p.open_files()]:
-                    return p.name(), p.pid
-        except Exception:
-            return None, None
-        return None, None
-
-    def on_created(self, event):
-        self._record_event(self.created_events)
-        if event.is_directory:
-            print(f"[DIR CREATED] {event.src_path}")
+            future = self._pool.submit(fn, *args)
+        except RuntimeError:
+            self._pending.release()  # pool already shut down
             return
+        future.add_done_callback(lambda f: self._job_done(f, fn, args))
+
+    def _job_done(self, future, fn, args):
+        try:
+            if not future.cancelled() and future.exception() is not None:
+                # repr() keeps undecodable paths printable
+                print(f"[WORKER ERROR] {fn.__name__}{args!r}: {future.exception()!r}")
+        finally:
+            self._pending.release()
+
+    def _submit_entropy(self, event_type, path, ext, now):
+        # Counted until the job finishes so on_moved can re-check a file renamed while queued
+        with self._lock:
+            self._in_flight[path] += 1
+        self._submit(self._process_entropy, event_type, path, ext, now)
+
+    def _process_entropy(self, event_type, path, ext, now):
+        try:
+            self._check_entropy(event_type, path, ext, now)
+        finally:
+            with self._lock:
+                self._in_flight[path] -= 1
+                if not self._in_flight[path]:
+                    del self._in_flight[path]
 
-        entropy = calculate_entropy(event.src_path)
-        ext = os.path.splitext(event.src_path)[1].lower() or '.noext'
-        self.extensions_last_10s.append((time.time(), ext))
+    def _check_entropy(self, event_type, path, ext, now):
+        st = _safe_stat(path)
+        entropy = calculate_entropy(path, st=st) if st else 0.0
 
         if entropy > CONFIG['entropy_threshold']:
-            self.high_entropy_count += 1
-            self.active_high_entropy_files.add(event.src_path)
-            self._log_to_csv('HIGH_ENTROPY_CREATE', f"{event.src_path} Entropy:{entropy:.2f}")
+            with self._lock:
+                if event_type == 'create' or path not in self.active_high_entropy_files:
+                    self.high_entropy_count += 1
+                self._mark_high_entropy(path)
+                label = 'HIGH_ENTROPY_CREATE' if event_type == 'create' else 'HIGH_ENTROPY_MODIFY'
+                self._log_to_csv(label, f"{path} Entropy:{entropy:.2f}", now)
 
-        if self.should_ignore(event.src_path): return
         if entropy < 0.5: return
 
-        size = os.path.getsize(event.src_path) if os.path.exists(event.src_path) else 0
-        process_name, pid = self._get_process_info(event)
-        print(f"[CREATED] {event.src_path: <70} Size: {size:>6} B Entropy: {entropy: >5.2f} Process: {process_name} (PID:{pid})")
+        size = st.st_size
+        process_name, pid = self._get_process_info(path)
+        label = '[CREATED]' if event_type == 'create' else '[MODIFIED]'
+        print(f"{label} {path: <70} Size: {size:>6} B Entropy: {entropy: >5.2f} Process: {process_name} (PID:{pid})")
 
         # Save feature vector for ML
-        self.feature_vectors.append({
-            'event_type': 'create',
-            'entropy': entropy,
-            'size': size,
-            'extension': ext,
-            'process': process_name
-        })
-
-    def on_modified(self, event):
-        self._record_event(self.modified_events)
-        if event.is_directory: return
+        self._append_features(event_type, entropy, size, ext, process_name)
 
-        entropy = calculate_entropy(event.src_path)
-        ext = os.path.splitext(event.src_path)[1].lower() or '.noext'
-        self.extensions_last_10s.append((time.time(), ext))
+    def on_created(self, event):
+        now = time.monotonic()
+        self._trim_and_append(self.created_events, now)
+        if event.is_directory:
+            print(f"[DIR CREATED] {event.src_path}")
+            return
+        if self.should_ignore(event.src_path): return
 
-        if entropy > CONFIG['entropy_threshold']:
-            if event.src_path not in self.active_high_entropy_files:
-                self.high_entropy_count += 1
-            self.active_high_entropy_files.add(event.src_path)
-            self._log_to_csv('HIGH_ENTROPY_MODIFY', f"{event.src_path} Entropy:{entropy:.2f}")
+        ext = _file_ext(event.src_path, '.noext')
+        self._push_ext(now, ext)
+        if ext in self.HIGH_ENTROPY_BY_DESIGN:
+            self._append_features('create', ext=ext)  # kept as a feature row; entropy/size stay nan/-1
+            return
+        self._submit_entropy('create', event.src_path, ext, now)
 
+    def on_modified(self, event):
+        now = time.monotonic()
+        self._trim_and_append(self.modified_events, now)
+        if event.is_directory: return
         if self.should_ignore(event.src_path): return
-        if entropy < 0.5: return
 
-        size = os.path.getsize(event.src_path) if os.path.exists(event.src_path) else 0
-        process_name, pid = self._get_process_info(event)
-        print(f"[MODIFIED] {event.src_path: <70} Size: {size:>6} B Entropy: {entropy: >5.2f} Process: {process_name} (PID:{pid})")
-
-        # Save feature vector
-        self.feature_vectors.append({
-            'event_type': 'modify',
-            'entropy': entropy,
-            'size': size,
-            'extension': ext,
-            'process': process_name
-        })
+        ext = _file_ext(event.src_path, '.noext')
+        self._push_ext(now, ext)
+        if ext in self.HIGH_ENTROPY_BY_DESIGN:
+            self._append_features('modify', ext=ext)
+            return
+        with self._lock:
+            self._settle(event.src_path, ext, now)
 
     def on_deleted(self, event):
-        self._record_event(self.deleted_events)
-        self.active_high_entropy_files.discard(event.src_path)
-        process_name, pid = self._get_process_info(event)
-        print(f"[DELETED] {event.src_path} Process: {process_name} (PID:{pid})")
+        now = time.monotonic()
+        self._trim_and_append(self.deleted_events, now)
+        with self._lock:
+            self.active_high_entropy_files.pop(event.src_path, None)
+            self._settling.pop(event.src_path, None)
+        self._submit(self._report_delete, event.src_path)
+
+    def _report_delete(self, path):
+        # Runs on the pool: the process scan must not stall the observer during a mass deletion
+        process_name, pid = self._get_process_info(path)
+        print(f"[DELETED] {path} Process: {process_name} (PID:{pid})")
 
         # Save feature vector
-        self.feature_vectors.append({
-            'event_type': 'delete',
-            'process': process_name
-        })
+        self._append_features('delete', process=process_name)
 
     def on_moved(self, event):
-        self._record_event(self.renamed_events)
+        now = time.monotonic()
+        self._trim_and_append(self.renamed_events, now)
         if event.is_directory: return
 
         dest_filename = os.path.basename(event.dest_path).lower()
-        suspicious_exts = [
-            '.locked', '.crypt', '.encrypted', '.pay', '.bitcoin', '.ransom',
-            '.wncry', '.ryuk', '.conti', '.locky', '.svchost', '.random'
-        ]
 
-        if any(dest_filename.endswith(ext) for ext in suspicious_exts):
+        if dest_filename.endswith(self.SUSPICIOUS_EXTS):
             print(f"[SUSPICIOUS RENAME] {event.src_path} → {event.dest_path}")
-            self._log_to_csv('SUSPICIOUS_RENAME', f"{event.src_path} → {event.dest_path}")
+            self._log_to_csv('SUSPICIOUS_RENAME', f"{event.src_path} → {event.dest_path}", now)
         else:
             print(f"[RENAMED] {event.src_path} → {event.dest_path}")
 
-        if event.src_path in self.active_high_entropy_files:
-            self.active_high_entropy_files.discard(event.src_path)
-            self.active_high_entropy_files.add(event.dest_path)
+        with self._lock:
+            if event.src_path in self.active_high_entropy_files:
+                del self.active_high_entropy_files[event.src_path]
+                self._mark_high_entropy(event.dest_path)
+            # Encrypt-then-rename: a pending entropy check would stat the old path and miss,
+            # so re-run it against the new name
+            pending = self._settling.pop(event.src_path, None) or self._in_flight.get(event.src_path)
+            dest_ext = _file_ext(event.dest_path, '.noext')
+            if (pending and not self.should_ignore(event.dest_path)
+                    and dest_ext not in self.HIGH_ENTROPY_BY_DESIGN):
+                self._settle(event.dest_path, dest_ext, now)
 
         # Save feature vector
-        self.feature_vectors.append({
-            'event_type': 'rename',
-            'old_ext': os.path.splitext(event.src_path)[1].lower(),
-            'new_ext': os.path.splitext(event.dest_path)[1].lower()
-        })
+        self._append_features('rename',
+                              old_ext=_file_ext(event.src_path),
+                              new_ext=_file_ext(event.dest_path))
 
     def print_summary(self):
-        c = self._count_last_10s(self.created_events)
-        m = self._count_last_10s(self.modified_events)
-        d = self._count_last_10s(self.deleted_events)
-        r = self._count_last_10s(self.renamed_events)
+        now = time.monotonic()
+        c = self._count_last_10s(self.created_events, now)
+        m = self._count_last_10s(self.modified_events, now)
+        d = self._count_last_10s(self.deleted_events, now)
+        r = self._count_last_10s(self.renamed_events, now)
         active_he = len(self.active_high_entropy_files)
 
         print(f"[SUMMARY 10s] Created: {c:>3} Modified: {m:>3} Deleted: {d:>3} Renamed: {r:>3} High-entropy: {self.high_entropy_count:>3} Active High-entropy: {active_he:>3}")
@@ -228,9 +455,23 @@ class RansomwareFileHandler(FileSystemEventHandler):
         if (c + m + d + r) > CONFIG['total_ops_threshold']:
             print("HIGH RISK! Massive file activity")
 
-    def get_feature_vector(self):
-        # Output standardized feature vector for ML engine
-        return pd.DataFrame(self.feature_vectors).to_numpy()  # or save to pickle for XGBoost
+    def get_feature_vector(self, as_frame=False):
+        # Output standardized feature vector for ML engine as {column: numpy array};
+        # pandas is only imported when a DataFrame is explicitly requested
+        with self._lock:
+            data = {
+                'event_type': np.asarray(self._fv_event_type),
+                'entropy': np.array(self._fv_entropy),
+                'size': np.array(self._fv_size),
+                'extension': np.asarray(self._fv_ext),
+                'process': np.asarray(self._fv_process),
+                'old_ext': np.asarray(self._fv_old_ext),
+                'new_ext': np.asarray(self._fv_new_ext),
+            }
+        if as_frame:
+            import pandas as pd
+            return pd.DataFrame(data)
+        return data
 
 
 if __name__ == "__main__":
@@ -259,6 +500,7 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
             now = time.time()
+            event_handler._flush_csv()
 
             # Terminal summary every 10 seconds
             if now - last_summary >= CONFIG['summary_interval']:
@@ -274,5 +516,6 @@ if __name__ == "__main__":
         print("\nStopping watcher...")
         observer.stop()
     observer.join()
+    event_handler.close()
     print("Watcher stopped.")
     print("Final data saved to ransomware_events.csv")